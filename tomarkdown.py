@@ -1,19 +1,43 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
+import base64
+import functools
+import glob
+import hashlib
 import json
 import os
+import re
+import html
+import io
 import tempfile
+import urllib.parse
+import urllib.request
 import webbrowser
 from pathlib import Path
 import threading
-import pyperclip
-from mistralai import Mistral
-from mistralai import DocumentURLChunk
-import markdown
-import tkhtmlview
+import pickle
+import shutil
+import time
 import sys
 
+try:
+    # Native CommonMark parser; falls back to python-markdown when unavailable
+    import md4c
+except ImportError:
+    md4c = None
+
+try:
+    # Faster JSON for the config file; both variants read and write UTF-8 bytes
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+    _json_loads = json.loads
+
 # Determine the appropriate config file path based on whether we're running as a bundled app
+@functools.cache
 def get_config_file_path():
     # For macOS app bundles
     if getattr(sys, 'frozen', False):
@@ -36,6 +60,193 @@ def get_config_file_path():
         return os.path.join(os.path.dirname(os.path.abspath(__file__)), "mistral_ocr_config.json")
 
 CONFIG_FILE = get_config_file_path()
+CONFIG_DIR = os.path.dirname(CONFIG_FILE)
+
+# Disk read size used while streaming a PDF to the upload endpoint
+_PDF_READ_CHUNK_SIZE = 1 << 20
+
+def _load_config_cached():
+    """Load CONFIG_FILE, reusing a pickled copy for as long as its mtime is unchanged."""
+    mtime_ns = os.stat(CONFIG_FILE).st_mtime_ns
+    cache_path = f"{CONFIG_FILE}.{mtime_ns}.pkl"
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            # Unreadable cache, reparse the JSON below
+            pass
+    
+    with open(CONFIG_FILE, 'rb') as f:
+        config = _json_loads(f.read())
+    
+    try:
+        with open(cache_path, 'wb') as f:
+            pickle.dump(config, f)
+        # Drop caches left behind by earlier versions of the config
+        for stale_path in glob.glob(glob.escape(CONFIG_FILE) + ".*.pkl"):
+            if stale_path != cache_path:
+                os.remove(stale_path)
+    except OSError:
+        # The cache is only an optimization, e.g. the bundle may be read-only
+        pass
+    return config
+
+# HTML wrappers for the converted markdown. The browser page is written to disk,
+# so its halves are kept pre-encoded; the in-app preview needs str.
+_FULL_HEAD = (
+    "<!DOCTYPE html>"
+    "<html>"
+    "<head>"
+    "    <script type=\"text/javascript\" id=\"MathJax-script\" async "
+    "        src=\"https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-mml-chtml.js\">"
+    "    </script>"
+    "    <script>"
+    "    window.MathJax = {"
+    "        tex: {"
+    "            inlineMath: [['$', '$'], ['\\\\(', '\\\\)']],"
+    "            displayMath: [['$$', '$$'], ['\\\\[', '\\\\]']],"
+    "            processEscapes: true"
+    "        },"
+    "        svg: {"
+    "            fontCache: 'global'"
+    "        }"
+    "    };"
+    "    </script>"
+    "    <style>"
+    "        body { font-family: Arial, sans-serif; line-height: 1.6; padding: 20px; }"
+    "        pre { background-color: #f5f5f5; padding: 10px; border-radius: 5px; }"
+    "        code { font-family: monospace; }"
+    "        img { max-width: 100%; }"
+    "        table { border-collapse: collapse; width: 100%; }"
+    "        th, td { border: 1px solid #ddd; padding: 8px; }"
+    "        th { background-color: #f2f2f2; }"
+    "    </style>"
+    "</head>"
+    "<body>"
+).encode('ascii')
+_FULL_TAIL = b"</body></html>"
+
+_SIMPLE_HEAD = (
+    "<html><head>"
+    "<style>"
+    "body { font-family: Arial, sans-serif; line-height: 1.6; }"
+    "pre { background-color: #f5f5f5; padding: 10px; border-radius: 5px; }"
+    "code { font-family: monospace; }"
+    "img { max-width: 100%; }"
+    "table { border-collapse: collapse; width: 100%; }"
+    "th, td { border: 1px solid #ddd; padding: 8px; }"
+    "</style></head><body>"
+)
+_SIMPLE_TAIL = "</body></html>"
+
+# Image placeholders in the OCR output look like ![img-0.jpeg]()
+_IMG_RE = re.compile(r'!\[([^\]]+)\]\(\)')
+
+# Header of a base64 data URI, e.g. data:image/jpeg;base64,
+_DATA_URI_RE = re.compile(r'data:([^,]*);base64,')
+
+# Preview images point at files on disk; tkhtmlview loads <img> sources as local paths
+_FILE_SRC_RE = re.compile(r'src="(file:[^"]*)"')
+
+def splice_images(markdown_str, images_dict):
+    """Fill the ![id]() placeholders in markdown_str with the sources in images_dict."""
+    # split() leaves the placeholder ids at the odd indices, so every image is
+    # built in one comprehension instead of a Python callback per match
+    parts = _IMG_RE.split(markdown_str)
+    parts[1::2] = [
+        "![" + img_name + "](" + images_dict[img_name] + ")"
+        if img_name in images_dict else "![" + img_name + "]()"
+        for img_name in parts[1::2]
+    ]
+    return "".join(parts)
+
+def image_data_uri(image_base64):
+    """Return image_base64 as a data URI, adding the PNG header if it has none."""
+    if image_base64.startswith("data:"):
+        return image_base64
+    return "data:image/png;base64," + image_base64
+
+def decode_image(image_base64):
+    """Return (bytes, extension) for an OCR image, or None if it cannot be decoded."""
+    if not image_base64:
+        return None
+    
+    # The API may send either bare base64 or a full data URI
+    extension = None
+    header = _DATA_URI_RE.match(image_base64)
+    if header:
+        mime_type = header.group(1).split(";")[0]
+        if mime_type.startswith("image/"):
+            extension = "." + mime_type[len("image/"):]
+        image_base64 = image_base64[header.end():]
+    
+    try:
+        return base64.b64decode(image_base64, validate=True), extension
+    except ValueError:
+        return None
+
+def localize_image_srcs(html_content):
+    """Turn file:// image URLs into plain paths that the preview widget can open."""
+    def localize(match):
+        url = urllib.parse.urlparse(html.unescape(match.group(1)))
+        return 'src="' + html.escape(urllib.request.url2pathname(url.path)) + '"'
+    
+    return _FILE_SRC_RE.sub(localize, html_content)
+
+# Tk text widgets only break lines on "\n", unlike str.splitlines()
+_TK_LINE_RE = re.compile(r'[^\n]*\n|[^\n]+')
+
+def inline_image_srcs(html_content, inline_srcs):
+    """Swap file:// image URLs for the data URIs they were written from."""
+    def inline(match):
+        url = html.unescape(match.group(1))
+        if url not in inline_srcs:
+            return match.group(0)
+        return 'src="' + inline_srcs[url] + '"'
+    
+    return _FILE_SRC_RE.sub(inline, html_content)
+
+_CODE_BLOCK_RE = re.compile(r'<pre><code class="language-([\w+#.-]+)">(.*?)</code></pre>', re.DOTALL)
+
+def render_markdown(markdown_content):
+    """Convert markdown to an HTML fragment, preferring md4c over python-markdown."""
+    if md4c is None:
+        import markdown
+        # codehilite pulls in Pygments and walks every code element, so only enable it for fenced code
+        extensions = ['tables', 'fenced_code']
+        if '```' in markdown_content:
+            extensions.append('codehilite')
+        return markdown.markdown(markdown_content, extensions=extensions)
+    
+    renderer = md4c.HTMLRenderer(md4c.MD_FLAG_TABLES | md4c.MD_FLAG_STRIKETHROUGH)
+    html_content = renderer.parse(markdown_content)
+    
+    # Only pay for syntax highlighting when there is a tagged code block
+    if html_content.find('<pre><code class="language-') != -1:
+        html_content = highlight_code_blocks(html_content)
+    return html_content
+
+def highlight_code_blocks(html_content):
+    """Highlight fenced code blocks with Pygments, like markdown's codehilite extension."""
+    try:
+        from pygments import highlight
+        from pygments.formatters import HtmlFormatter
+        from pygments.lexers import get_lexer_by_name
+        from pygments.util import ClassNotFound
+    except ImportError:
+        return html_content
+    
+    formatter = HtmlFormatter(cssclass="codehilite")
+    
+    def highlight_block(match):
+        try:
+            lexer = get_lexer_by_name(match.group(1))
+        except ClassNotFound:
+            return match.group(0)
+        return highlight(html.unescape(match.group(2)), lexer, formatter)
+    
+    return _CODE_BLOCK_RE.sub(highlight_block, html_content)
 
 class MistralOCRApp:
     def __init__(self, root):
@@ -49,10 +260,15 @@ class MistralOCRApp:
         self.status = tk.StringVar()
         self.status.set("Ready")
         self.markdown_content = ""
-        self.html_content = ""
+        self.html_bytes = b""
+        self._last_markdown = ""
+        self._client = None
+        self._client_key = None
+        self._img_dir = None
         
         self.create_widgets()
         self.load_config()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
     
     def create_widgets(self):
         # Main frame
@@ -64,8 +280,8 @@ class MistralOCRApp:
         api_frame.pack(fill=tk.X, padx=5, pady=5)
         
         ttk.Label(api_frame, text="Mistral API Key:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
-        api_entry = ttk.Entry(api_frame, textvariable=self.api_key, width=50, show="*")
-        api_entry.grid(row=0, column=1, sticky=tk.W, padx=5, pady=5)
+        self.api_entry = ttk.Entry(api_frame, textvariable=self.api_key, width=50, show="*")
+        self.api_entry.grid(row=0, column=1, sticky=tk.W, padx=5, pady=5)
         
         show_hide_btn = ttk.Button(api_frame, text="Show/Hide", command=self.toggle_api_key_visibility)
         show_hide_btn.grid(row=0, column=2, padx=5, pady=5)
@@ -106,12 +322,10 @@ class MistralOCRApp:
         self.preview_tab = ttk.Frame(self.notebook)
         self.notebook.add(self.preview_tab, text="Preview")
         
-        # Preview area
-        self.preview_widget = tkhtmlview.HTMLScrolledText(
-            self.preview_tab, 
-            html="<html><body><p>Markdown preview will appear here</p></body></html>"
-        )
-        self.preview_widget.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        # Preview area, created the first time the tab is shown
+        self.preview_widget = None
+        self.preview_html = "<html><body><p>Markdown preview will appear here</p></body></html>"
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
         
         # Action buttons
         action_frame = ttk.Frame(main_frame)
@@ -130,21 +344,30 @@ class MistralOCRApp:
         status_bar = ttk.Label(main_frame, textvariable=self.status, relief=tk.SUNKEN, anchor=tk.W)
         status_bar.pack(fill=tk.X, padx=5, pady=5)
     
+    def on_tab_changed(self, event):
+        if self.preview_widget is not None or self.notebook.select() != str(self.preview_tab):
+            return
+        
+        # tkhtmlview is only imported once the preview is actually needed
+        import tkhtmlview
+        self.preview_widget = tkhtmlview.HTMLScrolledText(self.preview_tab, html=self.preview_html)
+        self.preview_widget.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+    
     def toggle_api_key_visibility(self):
-        api_entry = self.root.nametowidget(self.root.focus_get().master.winfo_parent()).winfo_children()[1]
-        if api_entry.cget('show') == '*':
-            api_entry.config(show='')
+        if self.api_entry.cget('show') == '*':
+            self.api_entry.config(show='')
         else:
-            api_entry.config(show='*')
+            self.api_entry.config(show='*')
     
     def save_api_key(self):
         config = {"api_key": self.api_key.get()}
+        self._client = None
         try:
             # Ensure the directory exists
-            os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
+            os.makedirs(CONFIG_DIR, exist_ok=True)
             
-            with open(CONFIG_FILE, 'w') as f:
-                json.dump(config, f)
+            with open(CONFIG_FILE, 'wb') as f:
+                f.write(_json_dumps(config))
             
             self.status.set(f"API key saved to {CONFIG_FILE}")
             messagebox.showinfo("Success", f"API key saved successfully to:\n{CONFIG_FILE}")
@@ -156,15 +379,14 @@ class MistralOCRApp:
     def load_config(self):
         try:
             if os.path.exists(CONFIG_FILE):
-                with open(CONFIG_FILE, 'r') as f:
-                    config = json.load(f)
-                    self.api_key.set(config.get("api_key", ""))
+                config = _load_config_cached()
+                self.api_key.set(config.get("api_key", ""))
                 self.status.set("Config loaded from: " + CONFIG_FILE)
             else:
                 # Config file doesn't exist yet
                 self.status.set("No config file found. Will create at: " + CONFIG_FILE)
                 # Create parent directories if they don't exist
-                os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
+                os.makedirs(CONFIG_DIR, exist_ok=True)
         except Exception as e:
             self.status.set("Error loading config: " + str(e))
             messagebox.showwarning("Config Loading Error", 
@@ -187,7 +409,6 @@ class MistralOCRApp:
             return
         
         self.status.set("Converting PDF to Markdown...")
-        self.markdown_text.delete(1.0, tk.END)
         
         # Start conversion in a separate thread to avoid freezing UI
         thread = threading.Thread(target=self.convert_pdf)
@@ -196,6 +417,8 @@ class MistralOCRApp:
     
     def convert_pdf(self):
         try:
+            from mistralai import Mistral, DocumentURLChunk
+            
             # Get the PDF path and API key
             pdf_file = Path(self.pdf_path.get())
             api_key = self.api_key.get()
@@ -204,18 +427,23 @@ class MistralOCRApp:
                 self.update_status("Error: Invalid PDF file path")
                 return
             
-            # Initialize Mistral client
-            client = Mistral(api_key=api_key)
+            # Reuse the Mistral client (and its connection pool) until the API key changes
+            client = self._client
+            if client is None or self._client_key != api_key:
+                client = self._client = Mistral(api_key=api_key)
+                self._client_key = api_key
             
-            # Upload the file
+            # Upload the file, streaming it from disk instead of reading it all into memory
             self.update_status("Uploading PDF file...")
-            uploaded_file = client.files.upload(
-                file={
-                    "file_name": pdf_file.stem,
-                    "content": pdf_file.read_bytes(),
-                },
-                purpose="ocr",
-            )
+            with open(pdf_file, 'rb', buffering=_PDF_READ_CHUNK_SIZE) as pdf_stream:
+                uploaded_file = client.files.upload(
+                    file={
+                        "file_name": pdf_file.stem,
+                        "content": pdf_stream,
+                        "content_type": "application/pdf",
+                    },
+                    purpose="ocr",
+                )
             
             # Get the signed URL
             self.update_status("Processing with OCR...")
@@ -230,11 +458,20 @@ class MistralOCRApp:
             
             # Extract and format markdown
             self.update_status("Preparing markdown...")
-            markdown_content = self.get_combined_markdown(pdf_response)
+            markdown_content, preview_markdown, img_dir, inline_srcs = self.get_combined_markdown(pdf_response)
             self.markdown_content = markdown_content
             
+            # Render the preview here so the UI thread only has to display it. The
+            # preview links images from disk, so the parser skips the base64 text.
+            preview_body = render_markdown(preview_markdown)
+            html_content = localize_image_srcs(preview_body)
+            
+            # The browser page inlines the images again so it does not depend on the preview's temp files
+            export_body = inline_image_srcs(preview_body, inline_srcs).encode('utf-8')
+            html_bytes = b"".join((_FULL_HEAD, export_body, _FULL_TAIL))
+            
             # Update the UI with the result
-            self.root.after(0, self.update_result, markdown_content)
+            self.root.after(0, self.update_result, markdown_content, html_content, html_bytes, img_dir)
             
             self.update_status("Conversion completed")
             
@@ -246,94 +483,112 @@ class MistralOCRApp:
     def update_status(self, message):
         self.root.after(0, lambda: self.status.set(message))
     
-    def update_result(self, markdown_content):
-        # Update markdown text
-        self.markdown_text.delete(1.0, tk.END)
-        self.markdown_text.insert(tk.END, markdown_content)
-        
-        # Update preview with MathJax support
-        html_content = markdown.markdown(
-            markdown_content,
-            extensions=['tables', 'fenced_code', 'codehilite']
-        )
+    def update_result(self, markdown_content, html_content, html_bytes, img_dir):
+        # Update markdown text, only touching the lines that changed
+        self.update_markdown_text(markdown_content)
+        
+        # Show the source before the (slower) preview layout starts
+        self.root.update_idletasks()
         
         # Store for browser view
-        self.html_content = (
-            "<!DOCTYPE html>"
-            "<html>"
-            "<head>"
-            "    <script type=\"text/javascript\" id=\"MathJax-script\" async "
-            "        src=\"https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-mml-chtml.js\">"
-            "    </script>"
-            "    <script>"
-            "    window.MathJax = {"
-            "        tex: {"
-            "            inlineMath: [['$', '$'], ['\\\\(', '\\\\)']],"
-            "            displayMath: [['$$', '$$'], ['\\\\[', '\\\\]']],"
-            "            processEscapes: true"
-            "        },"
-            "        svg: {"
-            "            fontCache: 'global'"
-            "        }"
-            "    };"
-            "    </script>"
-            "    <style>"
-            "        body { font-family: Arial, sans-serif; line-height: 1.6; padding: 20px; }"
-            "        pre { background-color: #f5f5f5; padding: 10px; border-radius: 5px; }"
-            "        code { font-family: monospace; }"
-            "        img { max-width: 100%; }"
-            "        table { border-collapse: collapse; width: 100%; }"
-            "        th, td { border: 1px solid #ddd; padding: 8px; }"
-            "        th { background-color: #f2f2f2; }"
-            "    </style>"
-            "</head>"
-            "<body>"
-            + html_content +
-            "</body>"
-            "</html>"
-        )
+        self.html_bytes = html_bytes
         
         # Simplified version for in-app preview
-        simple_html = (
-            "<html><head>"
-            "<style>"
-            "body { font-family: Arial, sans-serif; line-height: 1.6; }"
-            "pre { background-color: #f5f5f5; padding: 10px; border-radius: 5px; }"
-            "code { font-family: monospace; }"
-            "img { max-width: 100%; }"
-            "table { border-collapse: collapse; width: 100%; }"
-            "th, td { border: 1px solid #ddd; padding: 8px; }"
-            "</style></head><body>"
-            + html_content +
-            "</body></html>"
-        )
+        simple_html = "".join((_SIMPLE_HEAD, html_content, _SIMPLE_TAIL))
         
-        self.preview_widget.set_html(simple_html)
+        self.preview_html = simple_html
+        if self.preview_widget is not None:
+            self.preview_widget.set_html(simple_html)
+        
+        # The preview now links this conversion's images, so the previous ones can go
+        old_img_dir, self._img_dir = self._img_dir, img_dir
+        if old_img_dir:
+            shutil.rmtree(old_img_dir, ignore_errors=True)
     
-    def replace_images_in_markdown(self, markdown_str, images_dict):
-        result = markdown_str
-        for img_name, base64_str in images_dict.items():
-            placeholder = "![" + img_name + "]()"
-            replacement = "![" + img_name + "](data:image/png;base64," + base64_str + ")"
-            result = result.replace(placeholder, replacement)
-        return result
+    def update_markdown_text(self, markdown_content):
+        old_lines = _TK_LINE_RE.findall(self._last_markdown)
+        new_lines = _TK_LINE_RE.findall(markdown_content)
+        
+        # Keep the unchanged head and tail of the document and replace only the middle
+        limit = min(len(old_lines), len(new_lines))
+        prefix = 0
+        while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+            suffix += 1
+        
+        # Rewrite everything if the user edited the text or most of the document changed
+        if self.markdown_text.edit_modified() or prefix + suffix < len(old_lines) // 2:
+            self.markdown_text.delete(1.0, tk.END)
+            self.markdown_text.insert(tk.END, markdown_content)
+        else:
+            old_end = len(old_lines) - suffix
+            new_end = len(new_lines) - suffix
+            if old_end > prefix:
+                self.markdown_text.delete(f"{prefix + 1}.0", f"{old_end + 1}.0")
+            if new_end > prefix:
+                self.markdown_text.insert(f"{prefix + 1}.0", "".join(new_lines[prefix:new_end]))
+        self.markdown_text.edit_modified(False)
+        self._last_markdown = markdown_content
     
     def get_combined_markdown(self, pdf_response):
-        markdowns = []
-        for page in pdf_response.pages:
-            img_data = {}
-            for img in page.images:
-                img_data[img.id] = img.image_base64
-            page_md = self.replace_images_in_markdown(page.markdown, img_data)
-            markdowns.append(page_md)
-        return "\n\n".join(markdowns)
+        """Return the markdown with base64 images, a preview copy linking image files, their
+        directory, and a map from each file URL back to its data URI."""
+        # A fresh directory per conversion, so the preview never shows a cached image from an earlier one
+        img_dir = tempfile.mkdtemp(prefix="mistral_ocr_img_")
+        buf = io.StringIO()
+        preview_buf = io.StringIO()
+        inline_srcs = {}
+        for page_index, page in enumerate(pdf_response.pages):
+            if page_index:
+                buf.write("\n\n")
+                preview_buf.write("\n\n")
+            
+            # Pages without images need no substitution at all
+            if not page.images:
+                buf.write(page.markdown)
+                preview_buf.write(page.markdown)
+                continue
+            
+            # Bulk-build the lookup from parallel id/base64 lists, skipping images without data
+            ids = [img.id for img in page.images if img.image_base64]
+            b64s = [img.image_base64 for img in page.images if img.image_base64]
+            img_data = dict(zip(ids, b64s))
+            data_uris = {img_id: image_data_uri(b64) for img_id, b64 in img_data.items()}
+            buf.write(splice_images(page.markdown, data_uris))
+            
+            # Only write out the images this page actually references
+            img_urls = {}
+            referenced_ids = [
+                img_id for img_id in dict.fromkeys(_IMG_RE.findall(page.markdown))
+                if img_id in img_data
+            ]
+            for img_index, img_id in enumerate(referenced_ids):
+                image = decode_image(img_data[img_id])
+                if image is None:
+                    # Leave it inline so the browser export still gets the original data URI
+                    img_urls[img_id] = data_uris[img_id]
+                    continue
+                image_bytes, extension = image
+                # Ids like img-0.jpeg repeat across pages, so name files by position
+                suffix = Path(img_id).suffix or extension or ".png"
+                img_path = Path(img_dir, f"page-{page_index}-img-{img_index}{suffix}")
+                img_path.write_bytes(image_bytes)
+                img_urls[img_id] = img_path.as_uri()
+                inline_srcs[img_urls[img_id]] = data_uris[img_id]
+            preview_buf.write(splice_images(page.markdown, img_urls))
+        return buf.getvalue(), preview_buf.getvalue(), img_dir, inline_srcs
     
     def copy_to_clipboard(self):
         if not self.markdown_content:
             messagebox.showinfo("Info", "No markdown content to copy")
             return
         
-        pyperclip.copy(self.markdown_content)
+        self.root.clipboard_clear()
+        self.root.clipboard_append(self.markdown_content)
+        # Process the clipboard ownership events so the copy is visible to other apps
+        self.root.update()
         self.status.set("Markdown copied to clipboard")
     
     def save_to_file(self):
@@ -352,39 +607,67 @@ class MistralOCRApp:
         
         if file_path:
             try:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(self.markdown_content)
+                # Encode once and hand the bytes straight to the OS
+                data = self.markdown_content.encode('utf-8')
+                with open(file_path, 'wb') as f:
+                    f.write(data)
                 self.status.set("Markdown saved to " + file_path)
             except Exception as e:
                 messagebox.showerror("Error", "Failed to save file: " + str(e))
     
     def open_in_browser(self):
         """Open the HTML preview with MathJax in the default web browser."""
-        if not hasattr(self, 'html_content') or not self.html_content:
+        if not self.html_bytes:
             messagebox.showinfo("Info", "No content to preview")
             return
         
-        # Create a temporary HTML file
-        with tempfile.NamedTemporaryFile(suffix='.html', delete=False, mode='w', encoding='utf-8') as f:
-            f.write(self.html_content)
-            temp_path = f.name
+        # Reuse the preview file for identical content so repeat opens skip the write
+        data = self.html_bytes
+        digest = hashlib.blake2b(data, digest_size=8).hexdigest()
+        temp_path = os.path.join(tempfile.gettempdir(), f"mistral_ocr_{digest}.html")
+        if not os.path.exists(temp_path):
+            # mkstemp gives a unique, owner-only (0600) file; leftovers still match the sweep
+            fd, partial_path = tempfile.mkstemp(prefix="mistral_ocr_", suffix=".part.html")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(partial_path, temp_path)
+            except Exception:
+                os.remove(partial_path)
+                raise
+        else:
+            # Keep it from being swept while it is still in use
+            os.utime(temp_path)
         
         # Open the file in the default browser
         webbrowser.open('file://' + temp_path)
         
         # Update status
         self.status.set("Opened preview in browser")
-        
-        # Schedule file cleanup (optional)
-        self.root.after(30000, lambda: self._cleanup_temp_file(temp_path))
     
-    def _cleanup_temp_file(self, filepath):
-        """Delete temporary files after a delay."""
-        try:
-            if os.path.exists(filepath):
-                os.remove(filepath)
-        except Exception:
-            pass
+    def on_close(self):
+        self._sweep_temp_files()
+        if self._img_dir:
+            shutil.rmtree(self._img_dir, ignore_errors=True)
+        self.root.destroy()
+    
+    def _sweep_temp_files(self):
+        """Delete browser preview files and image directories older than a day."""
+        cutoff = time.time() - 24 * 60 * 60
+        for filepath in glob.glob(os.path.join(tempfile.gettempdir(), "mistral_ocr_*.html")):
+            try:
+                if os.path.getmtime(filepath) < cutoff:
+                    os.remove(filepath)
+            except Exception:
+                pass
+        
+        # Image directories are left behind if the app is killed or a conversion fails
+        for dirpath in glob.glob(os.path.join(tempfile.gettempdir(), "mistral_ocr_img_*")):
+            try:
+                if dirpath != self._img_dir and os.path.getmtime(dirpath) < cutoff:
+                    shutil.rmtree(dirpath)
+            except Exception:
+                pass
 
 if __name__ == "__main__":
     root = tk.Tk()